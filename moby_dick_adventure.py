@@ -7,20 +7,50 @@ A retro-style text adventure where you play as Ishmael,
 making choices that determine your fate aboard the Pequod.
 """
 
+import argparse
+import ast
+import bisect
+import copy
+import functools
+import gzip
+import itertools
+import json
+import os
 import random
+import threading
 import time
+import types
 import sys
+import uuid
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import Dict, List, Tuple, Optional
 
+class Rewind(Exception):
+    """Raised to abandon the current scene and resume at an earlier one"""
+    def __init__(self, scene_index: int):
+        super().__init__(scene_index)
+        self.scene_index = scene_index
+
 class GameState:
-    """Manages the current state of the game"""
-    def __init__(self):
+    """Manages the current state of the game
+
+    Every change is recorded as an event in an append-only log and then
+    applied. A snapshot is checkpointed every few scenes, so rewinding to
+    any earlier scene restores one checkpoint and replays a short tail of
+    the log instead of the whole game.
+    """
+    CHECKPOINT_INTERVAL = 4
+    SNAPSHOT_FIELDS = ("health", "sanity", "reputation", "money", "current_chapter",
+                       "voyage_index", "inventory", "relationships", "flags", "ending")
+
+    def __init__(self, voyage_seed: Optional[int] = None, voyage_length: int = 3):
         self.player_name = "Ishmael"
         self.health = 100
         self.sanity = 100
         self.reputation = 50
         self.money = 20
-        self.current_chapter = 1
+        self.current_chapter = 0
         self.inventory = ["worn clothes", "small knife"]
         self.relationships = {
             "Queequeg": 0,
@@ -40,21 +70,461 @@ class GameState:
             "final_chase": False
         }
         self.ending = None
+        self.voyage_seed = random.randrange(2**32) if voyage_seed is None else voyage_seed
+        self.voyage_length = voyage_length
+        self.voyage_index = 0
+        self.events: List[Tuple] = []
+        self.scene_marks: List[int] = []
+        self.checkpoints: List[Tuple[int, Dict]] = []
+
+    def record(self, event: Tuple):
+        """Append an event to the log and apply it"""
+        if event[0] == "scene":
+            if len(self.scene_marks) % self.CHECKPOINT_INTERVAL == 0:
+                self.checkpoints.append((len(self.events), self.snapshot()))
+            self.scene_marks.append(len(self.events))
+        self.events.append(event)
+        self._apply(event)
+
+    def _apply(self, event: Tuple):
+        """Apply a single event to the current state"""
+        kind = event[0]
+        if kind == "stats":
+            _, health, sanity, reputation, money = event
+            self.health = max(0, min(100, self.health + health))
+            self.sanity = max(0, min(100, self.sanity + sanity))
+            self.reputation = max(0, min(100, self.reputation + reputation))
+            self.money = max(0, self.money + money)
+        elif kind == "relationship":
+            _, character, change = event
+            self.relationships[character] = max(-100, min(100,
+                self.relationships[character] + change))
+        elif kind == "flag":
+            _, name, value = event
+            self.flags[name] = value
+        elif kind == "scene":
+            self.current_chapter += 1
+        elif kind == "voyage":
+            self.voyage_index += 1
+        elif kind == "ending":
+            self.ending = event[1]
+
+    def snapshot(self) -> Dict:
+        """Copy the replayable fields of the state"""
+        return {name: copy.deepcopy(getattr(self, name)) for name in self.SNAPSHOT_FIELDS}
+
+    def restore(self, snapshot: Dict):
+        """Overwrite the replayable fields from a snapshot"""
+        for name, value in snapshot.items():
+            setattr(self, name, copy.deepcopy(value))
+
+    def visited_scenes(self) -> List[str]:
+        """Names of the scenes entered so far, in order"""
+        return [self.events[mark][1] for mark in self.scene_marks]
+
+    def last_choice_scene(self) -> Optional[int]:
+        """Index of the scene holding the most recent choice, if any"""
+        for position in range(len(self.events) - 1, -1, -1):
+            if self.events[position][0] == "choice":
+                return bisect.bisect_right(self.scene_marks, position) - 1
+        return None
+
+    def rewind(self, scene_index: int) -> str:
+        """Return to the moment an earlier scene began and give its name"""
+        position = self.scene_marks[scene_index]
+        checkpoint_at, snapshot = next((at, snap) for at, snap in reversed(self.checkpoints)
+                                       if at <= position)
+        self.restore(snapshot)
+        for event in self.events[checkpoint_at:position]:
+            self._apply(event)
+        scene = self.events[position][1]
+        del self.events[position:]
+        del self.scene_marks[scene_index:]
+        self.checkpoints = [(at, snap) for at, snap in self.checkpoints if at < position]
+        return scene
+
+def approximate_size(obj, seen: Optional[set] = None) -> int:
+    """Roughly estimate the memory held by an object and its contents"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(k, seen) + approximate_size(v, seen)
+                    for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += approximate_size(vars(obj), seen)
+    return size
+
+class GameMetrics:
+    """Collects live operational metrics for running game sessions
+
+    Every thread writes into its own shard, so the game loop never waits
+    on a lock to count something. A scrape sums the shards and computes
+    the per-session gauges on the spot.
+    """
+    LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300)
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple, float]] = []
+        self._sessions = weakref.WeakSet()
+        self._registry_lock = threading.Lock()
+        self._session_ids = itertools.count(1)
+
+    def _shard(self) -> Dict[Tuple, float]:
+        """Return the calling thread's private counter shard"""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._registry_lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, labels: Tuple = (), amount: float = 1):
+        """Increment a counter"""
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Tuple = ()):
+        """Record a value in a histogram"""
+        bucket = next((b for b in self.LATENCY_BUCKETS if value <= b), "+Inf")
+        self.inc(name + "_bucket", labels + (("le", str(bucket)),))
+        self.inc(name + "_sum", labels, value)
+        self.inc(name + "_count", labels)
+
+    def register_session(self, game):
+        """Track a game session for the per-session gauges"""
+        with self._registry_lock:
+            game.session_id = next(self._session_ids)
+            self._sessions.add(game)
+
+    def _totals(self) -> Dict[Tuple, float]:
+        """Sum all thread shards into one snapshot"""
+        with self._registry_lock:
+            shards = list(self._shards)
+        totals: Dict[Tuple, float] = {}
+        for shard in shards:
+            for key, value in list(shard.items()):
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    @staticmethod
+    def _format(name: str, labels: Tuple, value: float) -> str:
+        # Exact integers, and floats at full precision, so rate() stays accurate
+        value_text = str(value) if isinstance(value, int) else repr(float(value))
+        if labels:
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            return f"{name}{{{label_text}}} {value_text}"
+        return f"{name} {value_text}"
+
+    def _histogram_lines(self, name: str, totals: Dict[Tuple, float]) -> List[str]:
+        """Render cumulative buckets for every label set of a histogram"""
+        lines = []
+        label_sets = sorted({labels for (metric, labels) in totals
+                             if metric == name + "_count"})
+        for labels in label_sets:
+            running = 0
+            for bucket in self.LATENCY_BUCKETS + ("+Inf",):
+                running += totals.get((name + "_bucket", labels + (("le", str(bucket)),)), 0)
+                lines.append(self._format(name + "_bucket",
+                                          labels + (("le", str(bucket)),), running))
+            lines.append(self._format(name + "_sum", labels, totals[(name + "_sum", labels)]))
+            lines.append(self._format(name + "_count", labels, totals[(name + "_count", labels)]))
+        return lines
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        totals = self._totals()
+        lines = []
+
+        def counter(name: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (metric, labels), value in sorted(totals.items()):
+                if metric == name:
+                    lines.append(self._format(name, labels, value))
+
+        with self._registry_lock:
+            sessions = list(self._sessions)
+
+        lines.append("# HELP moby_active_sessions Running sessions by chapter and scene.")
+        lines.append("# TYPE moby_active_sessions gauge")
+        active: Dict[Tuple, int] = {}
+        for game in sessions:
+            if game.running and game.current_scene_name:
+                key = (("chapter", str(game.state.current_chapter)),
+                       ("scene", game.current_scene_name))
+                active[key] = active.get(key, 0) + 1
+        for labels, count in sorted(active.items()):
+            lines.append(self._format("moby_active_sessions", labels, count))
+
+        lines.append("# HELP moby_turn_latency_seconds Time spent in each scene, including player input.")
+        lines.append("# TYPE moby_turn_latency_seconds histogram")
+        lines.extend(self._histogram_lines("moby_turn_latency_seconds", totals))
+
+        counter("moby_print_slow_bytes_total", "Bytes written by the typewriter effect.")
+        counter("moby_print_slow_seconds_total", "Seconds spent in the typewriter effect.")
+        lines.append("# HELP moby_print_slow_bytes_per_second Average typewriter throughput.")
+        lines.append("# TYPE moby_print_slow_bytes_per_second gauge")
+        seconds = totals.get(("moby_print_slow_seconds_total", ()), 0)
+        written = totals.get(("moby_print_slow_bytes_total", ()), 0)
+        lines.append(self._format("moby_print_slow_bytes_per_second", (),
+                                  written / seconds if seconds else 0))
+
+        counter("moby_game_over_total", "Games lost, by cause.")
+        counter("moby_endings_total", "Games finished, by ending.")
+        counter("moby_story_reloads_total", "Hot reloads of story content.")
+
+        lines.append("# HELP moby_session_memory_bytes Approximate memory held by each session.")
+        lines.append("# TYPE moby_session_memory_bytes gauge")
+        for game in sorted(sessions, key=lambda g: g.session_id):
+            lines.append(self._format("moby_session_memory_bytes",
+                                      (("session", str(game.session_id)),),
+                                      approximate_size(game.state)))
+        return "\n".join(lines) + "\n"
+
+METRICS = GameMetrics()
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the metrics page for scrapers"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep scrapes from printing over the story text"""
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a background thread"""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+class SessionLog:
+    """Writes per-session choice events to a gzip-compressed JSON lines file
+
+    Each run gets a new file in the log directory, and each record carries
+    the session key, so many sessions can share one file; session_analytics.py
+    aggregates these logs. The gzip member is finished after every session
+    end, so a crash can only lose the sessions still in progress, and it
+    can only damage the tail of its own run's file.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "sessions-{}-{}.jsonl.gz".format(
+            time.strftime("%Y%m%d-%H%M%S"), uuid.uuid4().hex[:8]))
+        self._raw = open(self.path, "xb")
+        self._file = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line.encode("utf-8"))
+            if record.get("event") == "end":
+                self._file.close()
+                self._raw.flush()
+                self._file = gzip.GzipFile(fileobj=self._raw, mode="ab")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._raw.close()
+
+class EncounterChoice:
+    """One option offered during a voyage encounter and its consequences"""
+    def __init__(self, label: str, outcome: str, stats: Dict[str, int],
+                 relationship: Optional[Tuple[str, int]] = None, flag: Optional[str] = None):
+        self.label = label
+        self.outcome = outcome
+        self.stats = stats
+        self.relationship = relationship
+        self.flag = flag
+
+class Encounter:
+    """A generated scene from the long voyage between the doubloon and the whale"""
+    def __init__(self, title: str, text: str, prompt: str, choices: Tuple[EncounterChoice, ...]):
+        self.title = title
+        self.text = text
+        self.prompt = prompt
+        self.choices = choices
+
+# (ship, news, plea) - the plea is offered only to ships in need of help
+GAM_SHIPS = [
+    ("Goney", "Her captain raises his trumpet to answer Ahab's hail, but it slips from his hand into the sea.",
+     None),
+    ("Town-Ho", "Her crew whisper of a mutineer, a cruel mate, and a judgment delivered by the White Whale.",
+     None),
+    ("Jeroboam", "Fever rages aboard her, and a mad prophet named Gabriel warns against hunting Moby Dick.",
+     "Urge Starbuck to send medicine across to her fevered crew"),
+    ("Jungfrau", "Her captain begs for lamp oil - she has not taken a single whale this voyage.",
+     "Urge Starbuck to spare her a can of oil"),
+    ("Bouton de Rose", "She tows a sick, stinking whale, her crew ignorant of the ambergris hidden in its gut.",
+     None),
+    ("Samuel Enderby", "Her captain lost an arm to Moby Dick and wants nothing more to do with him.",
+     None),
+    ("Bachelor", "She sails for home full to the hatches, her crew dancing on deck in celebration.",
+     None),
+    ("Rachel", "Her captain pleads for help: his young son was lost in a whaleboat chasing the White Whale.",
+     "Urge Starbuck to join the Rachel's search for the lost boat"),
+    ("Delight", "She carries a shattered whaleboat and a sailcloth-wrapped body, fresh from the White Whale.",
+     "Urge Starbuck to stand by while she buries her dead"),
+]
+WHALES = ["sperm whale", "right whale", "pod of sperm whales", "lone bull whale"]
+MATES = ["Starbuck", "Stubb", "Flask"]
+STORMS = [
+    ("typhoon", "A typhoon strikes out of a darkened sky. Corposant fire burns blue on the mastheads."),
+    ("squall", "A sudden squall lays the Pequod on her beam ends before the sails can be taken in."),
+    ("gale", "For three days a gale drives the ship before it, the seas rising higher than the yards."),
+]
+ENCOUNTER_CACHE_SIZE = 64
+
+@functools.lru_cache(maxsize=ENCOUNTER_CACHE_SIZE)
+def generate_encounter(seed: int, index: int) -> Encounter:
+    """Build the voyage encounter at a position, deterministically from the seed"""
+    rng = random.Random(f"{seed}:{index}")
+    kind = rng.choice(["gam", "gam", "hunt", "hunt", "storm"])
+
+    if kind == "gam":
+        ship, news, plea = rng.choice(GAM_SHIPS)
+        if plea:
+            third = EncounterChoice(plea,
+                                    "Starbuck nods at you gravely, but Ahab has already turned the Pequod away.",
+                                    {"reputation": rng.randint(1, 5)},
+                                    ("Starbuck", rng.randint(5, 12)))
+        else:
+            third = EncounterChoice("Keep to your work while the captains talk",
+                                    "The ships part before your watch is over, and the voyage goes on.",
+                                    {"health": rng.randint(1, 4)})
+        return Encounter(
+            f"A Gam with the {ship}",
+            f"""
+Sails are sighted on the horizon, and the Pequod bears down upon
+the {ship}. {news}
+
+Ahab leans over the rail. "Hast seen the White Whale?"
+            """,
+            f"The {ship} lies alongside. What do you do?",
+            (
+                EncounterChoice("Row across and trade news with her crew",
+                                "You share tobacco and stories, and return with fresh rumors of whales.",
+                                {"reputation": rng.randint(3, 8), "sanity": rng.randint(2, 6)},
+                                ("Stubb", rng.randint(3, 8))),
+                EncounterChoice("Press her captain for word of Moby Dick",
+                                "What you hear of the White Whale stays with you through the night watches.",
+                                {"sanity": -rng.randint(4, 10)},
+                                ("Ahab", rng.randint(5, 12))),
+                third,
+            ),
+        )
+
+    if kind == "hunt":
+        whale = rng.choice(WHALES)
+        mate = rng.choice(MATES)
+        struck = rng.random() < 0.6
+        if struck:
+            dart = EncounterChoice("Stand up and dart the harpoon yourself",
+                                   "Your iron flies true! The whale is made fast, and the crew cheer you.",
+                                   {"reputation": rng.randint(8, 15), "money": rng.randint(5, 15)},
+                                   (mate, rng.randint(5, 10)), "first_whale")
+        else:
+            dart = EncounterChoice("Stand up and dart the harpoon yourself",
+                                   "The whale sounds, the line fouls, and you are pitched into the sea.",
+                                   {"health": -rng.randint(10, 20), "reputation": -rng.randint(2, 6)},
+                                   (mate, -rng.randint(2, 6)))
+        return Encounter(
+            f"{mate}'s Boat Gives Chase",
+            f"""
+"There she blows!" A {whale} breaches off the lee bow. The boats
+are lowered, and you pull an oar in {mate}'s boat as the mate
+roars encouragement and curses in equal measure.
+            """,
+            "The boat closes on the whale. What do you do?",
+            (
+                EncounterChoice("Pull steadily at your oar",
+                                "Your back aches, but the boat flies over the water as one.",
+                                {"health": -rng.randint(2, 6), "reputation": rng.randint(2, 6)},
+                                (mate, rng.randint(2, 6))),
+                dart,
+                EncounterChoice("Keep an eye on Pip, trembling in the bow",
+                                "When Pip leaps overboard in terror, you haul him back before he is lost.",
+                                {"sanity": -rng.randint(2, 6), "reputation": rng.randint(1, 4)},
+                                None, "pip_incident"),
+            ),
+        )
+
+    storm, description = rng.choice(STORMS)
+    flag = "typhoon_survived" if storm == "typhoon" else None
+    return Encounter(
+        f"The {storm.title()}",
+        f"""
+{description}
+The crew fight the wheel and the rigging while Ahab stands
+unmoved on the quarterdeck.
+        """,
+        f"The {storm} is upon you. What do you do?",
+        (
+            EncounterChoice("Help Starbuck reef the sails",
+                            "Together you save the topsails, though your hands are torn raw.",
+                            {"health": -rng.randint(3, 8)},
+                            ("Starbuck", rng.randint(5, 10)), flag),
+            EncounterChoice("Lash yourself to the rigging and hold on",
+                            "You ride out the storm soaked and shivering, but alive.",
+                            {"health": -rng.randint(1, 4), "sanity": -rng.randint(2, 6)},
+                            None, flag),
+            EncounterChoice("Watch Ahab defy the storm",
+                            "Ahab stands bareheaded on the quarterdeck and laughs at the sea. "
+                            "You cannot look away.",
+                            {"sanity": -rng.randint(6, 12)},
+                            ("Ahab", rng.randint(8, 15)), flag),
+        ),
+    )
 
 class MobyDickAdventure:
     """Main game class for the Moby Dick text adventure"""
-    
-    def __init__(self):
-        self.state = GameState()
+
+    def __init__(self, session_log: Optional[SessionLog] = None,
+                 voyage_seed: Optional[int] = None, voyage_length: int = 3,
+                 story: Optional["StoryReloader"] = None):
+        self.state = GameState(voyage_seed, voyage_length)
         self.running = True
-        
+        self.current_scene_name = None
+        self.session_log = session_log
+        self.story = story
+        self.session_key = uuid.uuid4().hex
+        METRICS.register_session(self)
+
+    def log_event(self, event: str, **fields):
+        """Record a session event if logging is enabled"""
+        if self.session_log:
+            self.session_log.write(dict(session=self.session_key, event=event, **fields))
+
     def print_slow(self, text: str, delay: float = 0.03):
         """Print text with typewriter effect"""
+        start = time.monotonic()
         for char in text:
             print(char, end='', flush=True)
             time.sleep(delay)
         print()
-        
+        METRICS.inc("moby_print_slow_bytes_total", amount=len(text.encode("utf-8")))
+        METRICS.inc("moby_print_slow_seconds_total", amount=time.monotonic() - start)
+
     def print_header(self, text: str):
         """Print a formatted header"""
         print("\n" + "="*60)
@@ -70,16 +540,31 @@ class MobyDickAdventure:
         print(f"Money: ${self.state.money}")
         print(f"Inventory: {', '.join(self.state.inventory)}")
         
-    def get_choice(self, prompt: str, choices: List[str]) -> int:
+    def get_choice(self, prompt: str, choices: List[str], allow_rewind: bool = True) -> int:
         """Get player choice with validation"""
         while True:
             print(f"\n{prompt}")
             for i, choice in enumerate(choices, 1):
                 print(f"{i}. {choice}")
-            
+
+            if allow_rewind:
+                answer = input("\nEnter your choice (number, 'u' to undo, 'r' to rewind): ")
+            else:
+                answer = input("\nEnter your choice (number): ")
+            if allow_rewind and answer.strip().lower() == "u":
+                self.undo_last_choice()
+                continue
+            if allow_rewind and answer.strip().lower() == "r":
+                self.rewind_to_chapter()
+                continue
+
             try:
-                choice = int(input("\nEnter your choice (number): "))
+                choice = int(answer)
                 if 1 <= choice <= len(choices):
+                    if allow_rewind:
+                        self.state.record(("choice", self.current_scene_name, choice - 1))
+                        self.log_event("choice", scene=self.current_scene_name, prompt=prompt,
+                                       choice=choice - 1, label=choices[choice - 1])
                     return choice - 1
                 else:
                     print("Invalid choice. Please try again.")
@@ -88,16 +573,34 @@ class MobyDickAdventure:
                 
     def modify_stats(self, health: int = 0, sanity: int = 0, reputation: int = 0, money: int = 0):
         """Modify player statistics"""
-        self.state.health = max(0, min(100, self.state.health + health))
-        self.state.sanity = max(0, min(100, self.state.sanity + sanity))
-        self.state.reputation = max(0, min(100, self.state.reputation + reputation))
-        self.state.money = max(0, self.state.money + money)
+        self.state.record(("stats", health, sanity, reputation, money))
         
     def modify_relationship(self, character: str, change: int):
         """Modify relationship with a character"""
         if character in self.state.relationships:
-            self.state.relationships[character] = max(-100, min(100, 
-                self.state.relationships[character] + change))
+            self.state.record(("relationship", character, change))
+
+    def set_flag(self, name: str, value: bool = True):
+        """Set a story flag"""
+        self.state.record(("flag", name, value))
+
+    def undo_last_choice(self):
+        """Go back to the scene where the last choice was made"""
+        scene_index = self.state.last_choice_scene()
+        if scene_index is None:
+            print("There is no choice to undo yet.")
+            return
+        raise Rewind(scene_index)
+
+    def rewind_to_chapter(self):
+        """Let the player pick an earlier chapter to return to"""
+        visited = self.state.visited_scenes()
+        labels = [f"Chapter {i}: {name.replace('_', ' ').title()}"
+                  for i, name in enumerate(visited, 1)]
+        choice = self.get_choice("Rewind to which chapter?", labels + ["Cancel"],
+                                 allow_rewind=False)
+        if choice < len(visited):
+            raise Rewind(choice)
 
     def intro(self):
         """Game introduction"""
@@ -152,7 +655,7 @@ You accept the arrangement and are shown to a small room upstairs.
 The bed is large enough for two, and you settle in to wait for 
 your mysterious roommate...
             """)
-            return self.meet_queequeg()
+            return self.meet_queequeg
             
         elif choice == 1:
             self.print_slow("""
@@ -161,7 +664,7 @@ comfortable, but it's warm and free. You overhear sailors
 talking about various ships and their captains.
             """)
             self.modify_stats(health=-10, money=2)
-            return self.morning_sermon()
+            return self.morning_sermon
             
         else:
             self.print_slow("""
@@ -170,7 +673,7 @@ After an hour of walking, you find a more expensive but private room.
 Your purse is lighter, but you sleep well.
             """)
             self.modify_stats(money=-5, health=5)
-            return self.morning_sermon()
+            return self.morning_sermon
 
     def meet_queequeg(self):
         """Meeting Queequeg scene"""
@@ -202,7 +705,7 @@ a peace offering. By morning, you've formed an unlikely friendship.
             """)
             self.modify_relationship("Queequeg", 30)
             self.modify_stats(sanity=10, reputation=5)
-            self.state.flags["met_queequeg"] = True
+            self.set_flag("met_queequeg")
             
         elif choice == 1:
             self.print_slow("""
@@ -222,7 +725,7 @@ a respected harpooner. You feel foolish and apologize awkwardly.
             self.modify_relationship("Queequeg", -10)
             self.modify_stats(reputation=-5)
             
-        return self.morning_sermon()
+        return self.morning_sermon
 
     def morning_sermon(self):
         """Father Mapple's sermon scene"""
@@ -257,7 +760,7 @@ of being swallowed by a great fish, and of redemption through suffering.
             self.modify_stats(reputation=-5)
             self.print_slow("Your dismissive attitude is noticed by other whalers.")
             
-        return self.journey_to_nantucket()
+        return self.journey_to_nantucket
 
     def journey_to_nantucket(self):
         """Journey to Nantucket"""
@@ -275,7 +778,7 @@ cobblestone ways. The smell of ambergris and spermaceti
 permeates the air.
         """)
         
-        return self.signing_with_pequod()
+        return self.signing_with_pequod
 
     def signing_with_pequod(self):
         """Signing aboard the Pequod"""
@@ -316,10 +819,10 @@ Peleg respects your boldness and improves your lay slightly.
             self.modify_stats(money=10, reputation=10)
             
         else:
-            return self.ask_about_ahab()
+            return self.ask_about_ahab
             
-        self.state.flags["signed_pequod"] = True
-        return self.elijah_prophecy()
+        self.set_flag("signed_pequod")
+        return self.elijah_prophecy
 
     def ask_about_ahab(self):
         """Learning about Captain Ahab"""
@@ -353,8 +856,8 @@ chipped a boat!"
         else:
             self.modify_stats(sanity=5)
             
-        self.state.flags["signed_pequod"] = True
-        return self.elijah_prophecy()
+        self.set_flag("signed_pequod")
+        return self.elijah_prophecy
 
     def elijah_prophecy(self):
         """Encounter with Elijah the prophet"""
@@ -387,7 +890,7 @@ Elijah speaks of doom and destruction, of a captain who has
 made a bargain with dark forces. His words chill you to the bone.
             """)
             self.modify_stats(sanity=-15)
-            self.state.flags["heard_prophecy"] = True
+            self.set_flag("heard_prophecy")
             
         elif choice == 1:
             self.print_slow("""
@@ -403,9 +906,9 @@ when he speaks of Ahab. Something terrible happened on the captain's
 last voyage.
             """)
             self.modify_stats(sanity=-10)
-            self.state.flags["heard_prophecy"] = True
+            self.set_flag("heard_prophecy")
             
-        return self.christmas_departure()
+        return self.christmas_departure
 
     def christmas_departure(self):
         """Departure on Christmas Day"""
@@ -425,7 +928,7 @@ The great adventure begins!
         """)
         
         self.modify_stats(health=10, sanity=5)
-        return self.early_voyage()
+        return self.early_voyage
 
     def early_voyage(self):
         """Early days of the voyage"""
@@ -479,7 +982,7 @@ The mystery deepens.
             """)
             self.modify_stats(sanity=-5)
             
-        return self.ahab_appears()
+        return self.ahab_appears
 
     def ahab_appears(self):
         """Captain Ahab finally appears on deck"""
@@ -517,8 +1020,8 @@ in a voice like thunder...
             self.modify_relationship("Ahab", 5)
             self.modify_stats(sanity=-5)
             
-        self.state.flags["ahab_revealed"] = True
-        return self.doubloon_scene()
+        self.set_flag("ahab_revealed")
+        return self.doubloon_scene
 
     def doubloon_scene(self):
         """Ahab nails the doubloon to the mast"""
@@ -575,7 +1078,31 @@ The crew is divided between excitement and unease.
             """)
             self.modify_stats(sanity=-5)
             
-        return self.final_chase()
+        return self.next_voyage_scene()
+
+    def next_voyage_scene(self):
+        """Sail on to the next encounter, or to the White Whale once the voyage is over"""
+        if self.state.voyage_index < self.state.voyage_length:
+            return self.voyage_encounter
+        return self.final_chase
+
+    def voyage_encounter(self):
+        """A generated encounter on the long voyage toward the White Whale"""
+        encounter = generate_encounter(self.state.voyage_seed, self.state.voyage_index)
+        self.print_header(encounter.title)
+        self.print_slow(encounter.text)
+
+        choice = self.get_choice(encounter.prompt, [c.label for c in encounter.choices])
+        outcome = encounter.choices[choice]
+        self.print_slow(outcome.outcome)
+        self.modify_stats(**outcome.stats)
+        if outcome.relationship:
+            self.modify_relationship(*outcome.relationship)
+        if outcome.flag:
+            self.set_flag(outcome.flag)
+
+        self.state.record(("voyage",))
+        return self.next_voyage_scene()
 
     def final_chase(self):
         """The three-day chase of Moby Dick"""
@@ -596,7 +1123,7 @@ from the sea like a moving island.
 The three-day chase begins...
         """)
         
-        return self.final_confrontation()
+        return self.final_confrontation
 
     def final_confrontation(self):
         """The climactic final battle"""
@@ -631,11 +1158,11 @@ The ship sinks in a great vortex, taking all hands with her.
         )
         
         if choice == 0:
-            return self.ending_survival()
+            return self.ending_survival
         elif choice == 1:
-            return self.ending_heroic()
+            return self.ending_heroic
         else:
-            return self.ending_obsession()
+            return self.ending_obsession
 
     def ending_survival(self):
         """Canonical survival ending"""
@@ -706,6 +1233,9 @@ Some obsessions are worth dying for.
 
     def print_final_stats(self, ending_type: str):
         """Print final game statistics"""
+        self.state.record(("ending", ending_type))
+        METRICS.inc("moby_endings_total", (("ending", ending_type),))
+        self.log_event("end", ending=ending_type, relationships=self.state.relationships)
         self.print_slow(f"""
         
 FINAL STATISTICS - {ending_type} ENDING:
@@ -733,13 +1263,34 @@ Thank you for playing MOBY DICK: A Text Adventure!
         
         while self.running and current_scene:
             try:
-                current_scene = current_scene()
-                
+                current_scene = self.pick_up_story_changes(current_scene)
+                self.current_scene_name = current_scene.__name__
+                self.state.record(("scene", self.current_scene_name))
+                self.log_event("scene", scene=self.current_scene_name)
+                started = time.monotonic()
+                try:
+                    next_scene = current_scene()
+                except Rewind as rewind:
+                    scene = self.state.rewind(rewind.scene_index)
+                    self.log_event("rewind", scene=scene, scene_index=rewind.scene_index)
+                    print("\n~~~ The tide turns back... ~~~")
+                    current_scene = self.resolve_scene(scene)
+                    continue
+                METRICS.observe("moby_turn_latency_seconds", time.monotonic() - started,
+                                (("scene", self.current_scene_name),))
+                current_scene = next_scene
+
                 # Check for game over conditions
                 if self.state.health <= 0:
+                    METRICS.inc("moby_game_over_total", (("cause", "health"),))
+                    self.log_event("end", ending="GAME OVER (health)",
+                                   relationships=self.state.relationships)
                     self.game_over("Your health has failed you at sea.")
                     break
                 elif self.state.sanity <= 0:
+                    METRICS.inc("moby_game_over_total", (("cause", "sanity"),))
+                    self.log_event("end", ending="GAME OVER (sanity)",
+                                   relationships=self.state.relationships)
                     self.game_over("Madness has claimed your mind.")
                     break
                     
@@ -750,6 +1301,24 @@ Thank you for playing MOBY DICK: A Text Adventure!
         if not self.running:
             print("\nThank you for playing Moby Dick: A Text Adventure!")
 
+    def pick_up_story_changes(self, next_scene):
+        """Switch to the latest reloaded story between scenes"""
+        if self.story is None or type(self) is self.story.story_class:
+            return next_scene
+        story_class = self.story.story_class
+        if not hasattr(story_class, next_scene.__name__):
+            # The next scene was deleted; finish it on the old story first
+            return next_scene
+        self.__class__ = story_class
+        return getattr(self, next_scene.__name__)
+
+    def resolve_scene(self, name: str):
+        """Look up a scene by name, including ones a reload has deleted"""
+        scene = getattr(self, name, None)
+        if scene is None and self.story is not None:
+            scene = types.MethodType(self.story.retired[name], self)
+        return scene
+
     def game_over(self, reason: str):
         """Handle game over"""
         self.print_header("GAME OVER")
@@ -757,6 +1326,123 @@ Thank you for playing MOBY DICK: A Text Adventure!
         self.print_status()
         self.running = False
 
+class StoryReloader:
+    """Hot-reloads the scenes of MobyDickAdventure while sessions keep playing
+
+    A background thread polls the source file. When it changes, only the
+    methods whose source differs are recompiled, and a new story class is
+    built from the current one and published with a single assignment.
+    Sessions switch to it at their next scene transition, so a scene that
+    is already running finishes on the code it started with.
+    """
+
+    def __init__(self, path: str = __file__, interval: float = 1.0):
+        self.path = path
+        self.interval = interval
+        self.story_class = MobyDickAdventure
+        self.retired: Dict[str, object] = {}
+        self._mtime = os.stat(path).st_mtime
+        with open(path, encoding="utf-8") as source_file:
+            self._sources = {name: text for name, (text, _) in
+                             self._scene_sources(source_file.read()).items()}
+
+    def _scene_sources(self, source: str) -> Dict[str, Tuple[str, ast.FunctionDef]]:
+        """Map each story method to its source text and syntax tree"""
+        tree = ast.parse(source, self.path)
+        story = next(node for node in tree.body
+                     if isinstance(node, ast.ClassDef) and node.name == MobyDickAdventure.__name__)
+        return {node.name: (ast.get_source_segment(source, node), node)
+                for node in story.body if isinstance(node, ast.FunctionDef)}
+
+    def check(self) -> List[str]:
+        """Reload the story if its source changed and return the swapped scenes"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            # Editors that save by renaming leave the file briefly missing
+            return []
+        if mtime == self._mtime:
+            return []
+        self._mtime = mtime
+        try:
+            with open(self.path, encoding="utf-8") as source_file:
+                source = source_file.read()
+        except (OSError, UnicodeDecodeError) as error:
+            print(f"\n[story reload skipped: {error}]", file=sys.stderr)
+            return []
+        try:
+            scenes = self._scene_sources(source)
+            changed = {name: node for name, (text, node) in scenes.items()
+                       if self._sources.get(name) != text}
+            compiled = {}
+            for name, node in changed.items():
+                namespace = {}
+                code = compile(ast.Module(body=[node], type_ignores=[]), self.path, "exec")
+                exec(code, globals(), namespace)
+                compiled[name] = namespace[name]
+                compiled[name].__qualname__ = f"{MobyDickAdventure.__name__}.{name}"
+        except Exception as error:
+            # Syntax errors, a missing class, or anything raised while
+            # defining a method (defaults, decorators) leave the story as is
+            print(f"\n[story reload skipped: {error!r}]", file=sys.stderr)
+            return []
+
+        removed = set(self._sources) - set(scenes)
+        if not compiled and not removed:
+            return []
+        current = self.story_class
+        for name in removed:
+            self.retired[name] = vars(current)[name]
+        for name in compiled:
+            self.retired.pop(name, None)
+        attributes = {name: value for name, value in vars(current).items()
+                      if name not in ("__dict__", "__weakref__") and name not in removed}
+        attributes.update(compiled)
+        self.story_class = type(current.__name__, current.__bases__, attributes)
+        self._sources = {name: text for name, (text, _) in scenes.items()}
+        METRICS.inc("moby_story_reloads_total")
+        return sorted(compiled)
+
+    def watch(self):
+        """Poll the source file forever"""
+        while True:
+            time.sleep(self.interval)
+            try:
+                swapped = self.check()
+            except Exception as error:
+                print(f"\n[story reload failed: {error!r}]", file=sys.stderr)
+                continue
+            if swapped:
+                print(f"\n[story reloaded: {', '.join(swapped)}]", file=sys.stderr)
+
+    def start(self):
+        """Start watching from a background thread"""
+        thread = threading.Thread(target=self.watch, daemon=True)
+        thread.start()
+
 if __name__ == "__main__":
-    game = MobyDickAdventure()
-    game.run_game()
+    parser = argparse.ArgumentParser(description="MOBY DICK: A Text Adventure")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve Prometheus metrics on this local port")
+    parser.add_argument("--session-log", metavar="DIRECTORY",
+                        help="write choice events to a new gzip JSON lines file in this directory")
+    parser.add_argument("--seed", type=int,
+                        help="seed for the voyage encounters (random by default)")
+    parser.add_argument("--voyage-length", type=int, default=3,
+                        help="number of encounters between the doubloon and the whale")
+    parser.add_argument("--hot-reload", action="store_true",
+                        help="pick up edits to the story scenes without restarting")
+    args = parser.parse_args()
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    session_log = SessionLog(args.session_log) if args.session_log else None
+    story = None
+    if args.hot_reload:
+        story = StoryReloader()
+        story.start()
+    try:
+        game = MobyDickAdventure(session_log, args.seed, args.voyage_length, story)
+        game.run_game()
+    finally:
+        if session_log:
+            session_log.close()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Session Log Analytics for MOBY DICK: A Text Adventure
+
+Aggregates the choice logs written with --session-log. Files are read in
+fixed-size chunks and folded into counters as they stream past, so memory
+stays bounded by the story content and the number of sessions still open
+in a file, not by the size of the logs. Files are crunched in parallel
+and the partial results merged. Choices a player later undid with a
+rewind are not counted.
+"""
+
+import argparse
+import gzip
+import json
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from typing import Dict, Iterator, List, Optional
+
+FUNNEL_SCENES = ("elijah_prophecy", "doubloon_scene", "final_confrontation")
+CHUNK_SIZE = 1 << 20
+
+def relationship_bracket(value: int) -> str:
+    """Group a relationship score into a coarse bracket"""
+    if value < 0:
+        return "hostile"
+    elif value < 25:
+        return "neutral"
+    elif value < 50:
+        return "friendly"
+    return "close"
+
+def iter_records(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """Yield log records from a (possibly gzip-compressed) file, chunk by chunk
+
+    A compressed file cut short by a crash yields what was readable, then
+    one malformed record for the lost tail.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as log_file:
+        pending = b""
+        while True:
+            try:
+                chunk = log_file.read1(chunk_size)
+            except (EOFError, gzip.BadGzipFile, zlib.error):
+                yield {"event": "malformed"}
+                return
+            if not chunk:
+                break
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield _decode(line)
+        if pending.strip():
+            yield _decode(pending)
+
+def _decode(line: bytes) -> Dict:
+    """Parse one log line, flagging lines cut short by a crash"""
+    try:
+        return json.loads(line)
+    except ValueError:
+        return {"event": "malformed"}
+
+class SessionAggregate:
+    """Mergeable counters computed from a stream of session log records"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.malformed = 0
+        self.funnel = Counter()
+        self.choices: Dict[str, Counter] = {}
+        self.endings = Counter()
+        self.endings_by_bracket: Dict[str, Counter] = {}
+        self._open: Dict[str, Dict] = {}
+
+    def add(self, record: Dict):
+        """Fold a single log record into the aggregate"""
+        event = record.get("event")
+        if event == "malformed":
+            self.malformed += 1
+            return
+        session = record.get("session")
+        progress = self._open.get(session)
+        if progress is None:
+            progress = self._open[session] = {"reached": set(), "scenes": 0, "choices": []}
+            self.sessions += 1
+
+        if event == "scene":
+            progress["scenes"] += 1
+            scene = record.get("scene")
+            if scene in FUNNEL_SCENES and scene not in progress["reached"]:
+                progress["reached"].add(scene)
+                self.funnel[scene] += 1
+        elif event == "choice":
+            progress["choices"].append((progress["scenes"], record["prompt"], record["label"]))
+        elif event == "rewind" and "scene_index" in record:
+            # Drop choices made in the rewound scene and every scene after it
+            progress["scenes"] = record["scene_index"]
+            progress["choices"] = [choice for choice in progress["choices"]
+                                   if choice[0] <= progress["scenes"]]
+        elif event == "end":
+            ending = record["ending"]
+            self.endings[ending] += 1
+            for character, value in record.get("relationships", {}).items():
+                key = f"{character}:{relationship_bracket(value)}"
+                self.endings_by_bracket.setdefault(key, Counter())[ending] += 1
+            self._count_choices(self._open.pop(session))
+
+    def _count_choices(self, progress: Dict):
+        """Add a session's surviving choices to the choice splits"""
+        for _, prompt, label in progress["choices"]:
+            self.choices.setdefault(prompt, Counter())[label] += 1
+
+    def close_file(self):
+        """Count and forget sessions left open at the end of a file"""
+        for progress in self._open.values():
+            self._count_choices(progress)
+        self._open.clear()
+
+    def merge(self, other: "SessionAggregate") -> "SessionAggregate":
+        """Combine another partial result into this one"""
+        self.sessions += other.sessions
+        self.malformed += other.malformed
+        self.funnel.update(other.funnel)
+        self.endings.update(other.endings)
+        for prompt, split in other.choices.items():
+            self.choices.setdefault(prompt, Counter()).update(split)
+        for bracket, endings in other.endings_by_bracket.items():
+            self.endings_by_bracket.setdefault(bracket, Counter()).update(endings)
+        return self
+
+    def report(self) -> Dict:
+        """Summarize the counters as counts and percentages"""
+        def percentages(counter: Counter) -> Dict[str, float]:
+            total = sum(counter.values())
+            return {key: round(100 * count / total, 2) for key, count in counter.most_common()}
+
+        return {
+            "sessions": self.sessions,
+            "malformed_lines": self.malformed,
+            "funnel": {scene: self.funnel[scene] for scene in FUNNEL_SCENES},
+            "choice_split_percent": {prompt: percentages(split)
+                                     for prompt, split in sorted(self.choices.items())},
+            "endings": dict(self.endings.most_common()),
+            "ending_rate_by_bracket_percent": {bracket: percentages(endings)
+                                               for bracket, endings
+                                               in sorted(self.endings_by_bracket.items())},
+        }
+
+def aggregate_file(path: str) -> SessionAggregate:
+    """Aggregate a single log file"""
+    aggregate = SessionAggregate()
+    for record in iter_records(path):
+        aggregate.add(record)
+    aggregate.close_file()
+    return aggregate
+
+def aggregate_files(paths: List[str], workers: Optional[int] = None) -> SessionAggregate:
+    """Aggregate many log files across a process pool"""
+    if workers == 1 or len(paths) <= 1:
+        partials = map(aggregate_file, paths)
+        return reduce(SessionAggregate.merge, partials, SessionAggregate())
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        partials = pool.map(aggregate_file, paths)
+        return reduce(SessionAggregate.merge, partials, SessionAggregate())
+
+def print_report(report: Dict):
+    """Print a human-readable summary"""
+    print(f"Sessions: {report['sessions']}")
+    print("\n--- FUNNEL ---")
+    for scene, count in report["funnel"].items():
+        print(f"{scene}: {count}")
+    print("\n--- CHOICES ---")
+    for prompt, split in report["choice_split_percent"].items():
+        print(prompt)
+        for label, percent in split.items():
+            print(f"  {percent:6.2f}%  {label}")
+    print("\n--- ENDINGS ---")
+    for ending, count in report["endings"].items():
+        print(f"{ending}: {count}")
+    print("\n--- ENDINGS BY RELATIONSHIP ---")
+    for bracket, split in report["ending_rate_by_bracket_percent"].items():
+        rates = ", ".join(f"{ending} {percent:.2f}%" for ending, percent in split.items())
+        print(f"{bracket}: {rates}")
+    if report["malformed_lines"]:
+        print(f"\nSkipped {report['malformed_lines']} malformed lines")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate Moby Dick session logs")
+    parser.add_argument("logs", nargs="+", help="session log files (.jsonl or .jsonl.gz)")
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    result = aggregate_files(args.logs, args.workers).report()
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)